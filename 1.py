@@ -4,19 +4,19 @@ and check the implicit assumption of sequential ordering in 't'.
 """
 
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
 # --- Configuration ---
 T_MIN = 6
 T_MAX = 60
+HEXBIN_THRESHOLD = 5000  # switch from per-point scatter to hexbin above this many points
 
 # Load data
 try:
     # Attempt to load the actual data file
-    data = pd.read_csv('xy_data.csv')
-    x_data = data['x'].values
-    y_data = data['y'].values
+    data = np.loadtxt('xy_data.csv', delimiter=',', skiprows=1, usecols=(0, 1), dtype=np.float32)
+    x_data = data[:, 0]
+    y_data = data[:, 1]
     print("Successfully loaded 'xy_data.csv'.")
 except FileNotFoundError:
     print("Error: 'xy_data.csv' not found. Generating placeholder data for demonstration.")
@@ -43,14 +43,27 @@ plt.figure(figsize=(10, 8))
 
 # Scatter plot where color indicates the index/order of the point
 # Points start as deep blue (low index) and fade to yellow/red (high index)
-scatter = plt.scatter(
-    x_data, 
-    y_data, 
-    c=indices, 
-    cmap='viridis', 
-    s=20, 
-    alpha=0.8
-)
+if N > HEXBIN_THRESHOLD:
+    # Too many points for individual markers: bin them, colour = mean index per cell
+    scatter = plt.hexbin(
+        x_data,
+        y_data,
+        C=indices,
+        gridsize=80,
+        cmap='viridis',
+        reduce_C_function=np.mean
+    )
+else:
+    scatter = plt.scatter(
+        x_data, 
+        y_data, 
+        c=indices, 
+        cmap='viridis', 
+        s=20, 
+        alpha=0.8,
+        linewidths=0,
+        rasterized=True
+    )
 plt.title(f'Raw Data Scatter Plot (N={N} points)\nColor indicates index (order in CSV)', fontsize=14)
 plt.xlabel('X Coordinate', fontsize=12)
 plt.ylabel('Y Coordinate', fontsize=12)
@@ -68,7 +81,7 @@ plt.grid(True, linestyle='--', alpha=0.5)
 
 # Save the visualization
 try:
-    plt.savefig('data_visualization.png', dpi=300, bbox_inches='tight')
+    plt.savefig('data_visualization.png', dpi=150, bbox_inches='tight')
     print("✓ Visualization saved to data_visualization.png.")
 except Exception:
     print("Warning: Could not save visualization file. Skipping save.")
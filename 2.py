@@ -9,84 +9,82 @@ import sys
 from pathlib import Path
 
 
-def generate_tree(directory, prefix="", is_last=True, max_depth=None, current_depth=0, show_hidden=False):
+def generate_tree(directory, max_depth=None, show_hidden=False):
     """
     Generate a tree structure of the directory.
     
+    Walks the tree with an explicit stack over os.scandir, so DirEntry's
+    cached type information is reused instead of a stat() per entry, and
+    deep trees do not hit the recursion limit. Symlinks to directories are
+    shown as directories but not descended into (like os.walk), so link
+    cycles cannot loop forever.
+    
     Args:
         directory: Path to the directory
-        prefix: Prefix for the current line
-        is_last: Whether this is the last item in its parent directory
         max_depth: Maximum depth to traverse (None for unlimited)
-        current_depth: Current depth in the tree
         show_hidden: Whether to show hidden files/folders (starting with .)
+    
+    Returns:
+        (dir_count, file_count) of the entries shown, counted during the
+        same traversal so the tree is only read once. Symlinks to
+        directories count as directories, as they did with os.walk.
     """
-    # Check if max depth is reached
-    if max_depth is not None and current_depth >= max_depth:
-        return
-    
-    # Get the directory path
-    path = Path(directory)
-    
-    # Print the current directory/file name
-    if current_depth == 0:
-        print(f"📁 {path.name}/")
-    else:
-        connector = "└── " if is_last else "├── "
-        icon = "📁 " if path.is_dir() else "📄 "
-        print(f"{prefix}{connector}{icon}{path.name}{'/' if path.is_dir() else ''}")
-    
-    # If it's a file, return
-    if not path.is_dir():
-        return
+    root = Path(directory)
+    dir_count = 0
+    file_count = 0
     
-    # Get all items in the directory
-    try:
-        items = list(path.iterdir())
+    # Each entry: (path, name, is_dir, descend, prefix, is_last, depth)
+    stack = [(root, root.name, root.is_dir(), root.is_dir(), "", True, 0)]
+    
+    while stack:
+        path, name, is_dir, descend, prefix, is_last, depth = stack.pop()
         
-        # Filter hidden files if requested
-        if not show_hidden:
-            items = [item for item in items if not item.name.startswith('.')]
+        # Check if max depth is reached
+        if max_depth is not None and depth >= max_depth:
+            continue
         
-        # Sort items: directories first, then files
-        items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
+        # Print the current directory/file name
+        if depth == 0:
+            print(f"📁 {name}/")
+        else:
+            connector = "└── " if is_last else "├── "
+            icon = "📁 " if is_dir else "📄 "
+            print(f"{prefix}{connector}{icon}{name}{'/' if is_dir else ''}")
+            # Count with the same directory test used for the icon
+            if is_dir:
+                dir_count += 1
+            else:
+                file_count += 1
         
-    except PermissionError:
-        print(f"{prefix}{'    ' if is_last else '│   '}⚠️  [Permission Denied]")
-        return
-    
-    # Process each item
-    for index, item in enumerate(items):
-        is_last_item = index == len(items) - 1
-        extension = "    " if is_last else "│   "
-        new_prefix = prefix + extension
+        # If it's a file (or a directory symlink), move on
+        if not descend:
+            continue
         
-        # Recursively process subdirectories
-        generate_tree(
-            item,
-            new_prefix,
-            is_last_item,
-            max_depth,
-            current_depth + 1,
-            show_hidden
-        )
-
-
-def count_items(directory, show_hidden=False):
-    """Count the number of files and directories."""
-    path = Path(directory)
-    file_count = 0
-    dir_count = 0
-    
-    for root, dirs, files in os.walk(path):
-        if not show_hidden:
-            # Filter hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-            # Filter hidden files
-            files = [f for f in files if not f.startswith('.')]
+        # Get all items in the directory
+        try:
+            with os.scandir(path) as it:
+                # is_dir() only stat()s symlinks; other entries use the readdir type
+                items = [
+                    (entry.path, entry.name, entry.is_dir(), entry.is_symlink())
+                    for entry in it
+                    # Filter hidden files if requested
+                    if show_hidden or not entry.name.startswith('.')
+                ]
+        except PermissionError:
+            print(f"{prefix}{'    ' if is_last else '│   '}⚠️  [Permission Denied]")
+            continue
+        
+        # Sort items: directories first, then files
+        items.sort(key=lambda item: (not item[2], item[1].lower()))
         
-        dir_count += len(dirs)
-        file_count += len(files)
+        # Push children in reverse so they pop (and print) in sorted order
+        new_prefix = prefix + ("    " if is_last else "│   ")
+        for index in range(len(items) - 1, -1, -1):
+            item_path, item_name, item_is_dir, item_is_link = items[index]
+            is_last_item = index == len(items) - 1
+            item_descend = item_is_dir and not item_is_link
+            stack.append((item_path, item_name, item_is_dir, item_descend,
+                          new_prefix, is_last_item, depth + 1))
     
     return dir_count, file_count
 
@@ -142,10 +140,9 @@ def main():
     print("-" * 50)
     
     try:
-        generate_tree(path, max_depth=max_depth, show_hidden=show_hidden)
+        # Display the tree and collect statistics in the same pass
+        dir_count, file_count = generate_tree(path, max_depth=max_depth, show_hidden=show_hidden)
         
-        # Count and display statistics
-        dir_count, file_count = count_items(path, show_hidden)
         print("\n" + "-" * 50)
         print(f"📊 Summary: {dir_count} directories, {file_count} files")
         
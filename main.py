@@ -1,46 +1,140 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy.optimize import differential_evolution, minimize
-from scipy.interpolate import interp1d
+from scipy.optimize import basinhopping, differential_evolution, minimize
 import multiprocessing, time, os
+from collections import OrderedDict
+from functools import partial
+
+try:
+    import kernels  # numba JIT path
+except ImportError:
+    kernels = None
 
 T_MIN, T_MAX = 6, 60
 RANDOM_SEED = 42
-POP_SIZE = 25
+POP_SIZE = 21  # 21 x 3 params = 63; SciPy rounds a Sobol' population up to the next power of 2 (64)
 MAX_ITER = 800
-N_STARTS = 3
-USE_EUCLIDEAN = False
+N_HOPS = 30
+WORKERS = 1  # 1 = vectorized batches in-process; -1 / >1 = process pool per candidate
 
 
-def parametric_curve(t, theta_deg, M, X):
+def parametric_curve(theta_deg, M, X, t, abs_t, sin03t, work=None):
+    """Curve points; `work` is an optional (x, y, wave, tmp) set of buffers to fill in place."""
     th = np.deg2rad(theta_deg)
-    exp_term = np.exp(np.clip(M * np.abs(t), -30, 30))
-    sin_term = np.sin(0.3 * t)
-    x = t * np.cos(th) - exp_term * sin_term * np.sin(th) + X
-    y = 42 + t * np.sin(th) + exp_term * sin_term * np.cos(th)
+    if work is None:
+        shape = np.broadcast_shapes(np.shape(th), np.shape(t))
+        work = tuple(np.empty(shape, dtype=np.result_type(th, t)) for _ in range(4))
+    x, y, wave, tmp = work
+    np.multiply(M, abs_t, out=wave)  # |M| <= 0.08, |t| <= 60: never overflows
+    np.exp(wave, out=wave)
+    np.multiply(wave, sin03t, out=wave)
+    cos_th, sin_th = np.cos(th), np.sin(th)
+    np.multiply(t, cos_th, out=x)
+    np.multiply(wave, sin_th, out=tmp)
+    x -= tmp
+    x += X
+    np.multiply(t, sin_th, out=y)
+    np.multiply(wave, cos_th, out=tmp)
+    y += tmp
+    y += 42
     return x, y
 
-def objective(params, t_vals, x_data, y_data):
-    theta, M, X = params
-    if not (0 <= theta <= 50 and -0.08 <= M <= 0.08 and 0 <= X <= 100):
-        return np.inf
-    x_pred, y_pred = parametric_curve(t_vals, theta, M, X)
-    if not np.all(np.isfinite(x_pred)) or not np.all(np.isfinite(y_pred)):
-        return np.inf
-    idx = np.argsort(x_pred)
-    x_sorted, y_sorted = x_pred[idx], y_pred[idx]
-    try:
-        interp = interp1d(x_sorted, y_sorted,
-                          bounds_error=False,
-                          fill_value=(y_sorted[0], y_sorted[-1]))
-        y_interp = interp(x_data)
-    except Exception:
-        return np.inf
-    dy = y_interp - y_data
-    err = np.sum(np.abs(dy)) if not USE_EUCLIDEAN else np.sum(np.hypot(np.zeros_like(dy), dy))
-    reg = ((M - 0.015) / 0.02) ** 2
-    return err + 200 * reg
+_WORK = {}
+
+def work_buffers(shape, dtype):
+    """(x, y, wave, tmp) buffers of `shape`, allocated once and reused."""
+    key = (shape, np.dtype(dtype))
+    if key not in _WORK:
+        _WORK[key] = tuple(np.empty(shape, dtype=dtype) for _ in range(4))
+    return _WORK[key]
+
+def interp_rows(x, xp, fp):
+    """Row-wise np.interp: evaluate each sorted (xp[k], fp[k]) at x, clamped at the ends."""
+    n = xp.shape[1]
+    hi = np.empty((xp.shape[0], x.shape[0]), dtype=np.intp)
+    for k in range(xp.shape[0]):
+        hi[k] = np.searchsorted(xp[k], x)
+    hi = np.clip(hi, 1, n - 1)
+    lo = hi - 1
+    x_lo, x_hi = np.take_along_axis(xp, lo, axis=1), np.take_along_axis(xp, hi, axis=1)
+    f_lo, f_hi = np.take_along_axis(fp, lo, axis=1), np.take_along_axis(fp, hi, axis=1)
+    span = x_hi - x_lo
+    w = np.divide(x - x_lo, span, out=np.zeros_like(span), where=span != 0)
+    np.clip(w, 0, 1, out=w)
+    return f_lo + w * (f_hi - f_lo)
+
+class BoundedStep:
+    """basinhopping step: uniform jump scaled to each parameter's range, clipped to bounds."""
+
+    def __init__(self, bounds, stepsize=0.05, seed=None):
+        self.lo, self.hi = np.array(bounds, dtype=float).T
+        self.stepsize = stepsize
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, x):
+        jump = self.rng.uniform(-1, 1, x.shape) * self.stepsize * (self.hi - self.lo)
+        return np.clip(x + jump, self.lo, self.hi)
+
+class MemoizedObjective:
+    """LRU cache in front of a single-candidate objective.
+
+    Used for the float64 objective only: basin-hopping and L-BFGS-B revisit
+    points, DE batches essentially never repeat. Keys are parameters rounded
+    to 12 decimals, fine enough that L-BFGS-B's finite-difference steps
+    (~1e-8) never collide.
+    """
+
+    def __init__(self, fn, maxsize=4096):
+        self.fn = fn
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    def __call__(self, params):
+        params = np.asarray(params, dtype=float)
+        key = tuple(np.round(params, 12))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        val = self.fn(params)
+        self.cache[key] = val
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return val
+
+def objective(params, t_vals, abs_t, sin03t, x_data, y_data):
+    """L1 fit loss for one (3,) candidate or a (3, M) batch of candidates.
+
+    The curve is evaluated in the dtype of t_vals (float32 for DE); the loss is
+    always accumulated in float64.
+    """
+    params = np.asarray(params, dtype=float)
+    single = params.ndim == 1
+    theta, M, X = (params[:, None] if single else params)[:, :, None]
+
+    valid = ((0 <= theta) & (theta <= 50) & (-0.08 <= M) & (M <= 0.08)
+             & (0 <= X) & (X <= 100))[:, 0]
+    reg = ((M[:, 0] - 0.015) / 0.02) ** 2
+    dtype = t_vals.dtype
+    # Rejected rows are still evaluated (then masked); clipping their M keeps
+    # exp() in range without a clip over the whole (M, N) array.
+    M_eval = np.clip(M, -0.08, 0.08)
+    x_pred, y_pred = parametric_curve(theta.astype(dtype), M_eval.astype(dtype), X.astype(dtype),
+                                      t_vals[None, :], abs_t[None, :], sin03t[None, :],
+                                      work=work_buffers((theta.shape[0], t_vals.shape[0]), dtype))
+    valid &= np.all(np.isfinite(x_pred), axis=1) & np.all(np.isfinite(y_pred), axis=1)
+
+    # x(t) is monotone for almost every candidate; only sort the rows that are not.
+    unsorted = np.flatnonzero(np.any(np.diff(x_pred, axis=1) < 0, axis=1))
+    if unsorted.size:
+        idx = np.argsort(x_pred[unsorted], axis=1)
+        x_pred[unsorted] = np.take_along_axis(x_pred[unsorted], idx, axis=1)
+        y_pred[unsorted] = np.take_along_axis(y_pred[unsorted], idx, axis=1)
+    y_interp = interp_rows(x_data, x_pred, y_pred)
+    dy = y_interp[valid] - y_data
+    err = np.sum(np.abs(dy), axis=1, dtype=np.float64)
+
+    loss = np.full(x_pred.shape[0], np.inf)
+    loss[valid] = err + 200 * reg[valid]
+    return loss[0] if single else loss
 
 
 if __name__ == "__main__":
@@ -48,51 +142,67 @@ if __name__ == "__main__":
     np.random.seed(RANDOM_SEED)
     os.makedirs("results", exist_ok=True)
 
-    data = pd.read_csv("xy_data.csv")
-    x_data, y_data = data["x"].to_numpy(), data["y"].to_numpy()
+    data = np.loadtxt("xy_data.csv", delimiter=",", skiprows=1, usecols=(0, 1))
+    x_data, y_data = data[:, 0], data[:, 1]
     N = len(x_data)
     t_vals = np.linspace(T_MIN, T_MAX, N)
-    func = lambda p: objective(p, t_vals, x_data, y_data)
+    abs_t, sin03t = np.abs(t_vals), np.sin(0.3 * t_vals)
+    loss_fn = kernels.objective if kernels is not None else objective
+    arrays = dict(t_vals=t_vals, abs_t=abs_t, sin03t=sin03t, x_data=x_data, y_data=y_data)
+    # float64 for the gradient-based steps (finite differences need it);
+    # float32 halves the memory traffic of the DE search.
+    func = MemoizedObjective(partial(loss_fn, **arrays))
+    func32 = partial(loss_fn, **{k: v.astype(np.float32) for k, v in arrays.items()})  # picklable for workers
     bounds = [(0, 50), (-0.08, 0.08), (0, 100)]
 
-    best = None
-    global_snapshots = []
-
-
-    for run in range(1, N_STARTS + 1):
-        print(f"\n--- Global Run {run}/{N_STARTS} ---")
-        progress, snapshots = [], []
-
-        def log_progress(xk, conv):
-            val = func(xk)
-            progress.append(val)
-            if len(progress) % 10 == 0:
-                snapshots.append(xk.copy())
-                print(f"  -> Iter {len(progress):4d}, best L1 = {val:.2f}")
-
-        res = differential_evolution(
-            func,
-            bounds,
-            seed=RANDOM_SEED + run * 3,
-            popsize=POP_SIZE,
-            maxiter=MAX_ITER,
-            updating="deferred",
-            workers=1,
-            callback=log_progress,
-            polish=False,
-        )
-
-        pd.DataFrame({"iteration": np.arange(1, len(progress)+1), "L1": progress}).to_csv(
-            f"results/de_progress_run{run}.csv", index=False
-        )
-        global_snapshots.append(snapshots)
-        print(f"  DE result: {res.fun:.2f} @ {res.x}")
-        if best is None or res.fun < best.fun:
-            best = res
-
-    print("\nRunning local Nelder–Mead refinement...")
-    loc = minimize(func, best.x, method="Nelder-Mead",
-                   options={"maxiter": 2000, "xatol": 1e-9, "fatol": 1e-9})
+    print("\n--- Global DE Run ---")
+    progress, snapshots = [], []
+
+    def log_progress(intermediate_result):
+        # DE hands over its best member and energy; no need to re-evaluate it.
+        val = intermediate_result.fun
+        progress.append(val)
+        if len(progress) % 10 == 0:
+            snapshots.append(intermediate_result.x.copy())
+            print(f"  -> Iter {len(progress):4d}, best L1 = {val:.2f}")
+
+    best = differential_evolution(
+        func32,
+        bounds,
+        seed=RANDOM_SEED + 3,
+        popsize=POP_SIZE,
+        init="sobol",
+        maxiter=MAX_ITER,
+        updating="deferred",
+        workers=WORKERS,
+        vectorized=WORKERS == 1,
+        callback=log_progress,
+        polish=False,
+    )
+
+    iterations = np.arange(1, len(progress) + 1)
+    np.savetxt("results/de_progress_run1.csv", np.column_stack([iterations, progress]),
+               delimiter=",", header="iteration,L1", comments="", fmt=["%d", "%.12g"])
+    best.fun = func(best.x)
+    print(f"  DE result: {best.fun:.2f} @ {best.x}")
+
+    # Hop around the DE optimum instead of cold-restarting DE from scratch.
+    print(f"\n--- Basin-hopping ({N_HOPS} hops) ---")
+    hop = basinhopping(
+        func,
+        best.x,
+        niter=N_HOPS,
+        minimizer_kwargs={"method": "L-BFGS-B", "bounds": bounds},
+        take_step=BoundedStep(bounds, stepsize=0.05, seed=RANDOM_SEED),
+        seed=RANDOM_SEED,
+    )
+    print(f"  Basin-hopping result: {hop.fun:.2f} @ {hop.x}")
+    if hop.fun < best.fun:
+        best = hop
+
+    print("\nRunning local L-BFGS-B refinement...")
+    loc = minimize(func, best.x, method="L-BFGS-B", bounds=bounds,
+                   options={"ftol": 1e-10, "gtol": 1e-8, "maxiter": 200})
     if loc.fun < best.fun:
         best = loc
 
@@ -111,33 +221,53 @@ if __name__ == "__main__":
     print(f"\\left({latex_x}, {latex_y}\\right)")
 
 
-    x_fit, y_fit = parametric_curve(t_vals, theta, M, X)
+    x_fit, y_fit = parametric_curve(theta, M, X, t_vals, abs_t, sin03t)
     residuals = np.hypot(x_fit - x_data, y_fit - y_data) 
 
     
-    first_snapshot_params = global_snapshots[0][0]
-    x_fit_initial, y_fit_initial = parametric_curve(t_vals, *first_snapshot_params)
+    first_snapshot_params = snapshots[0]
+    x_fit_initial, y_fit_initial = parametric_curve(*first_snapshot_params, t_vals, abs_t, sin03t)
     initial_l1 = func(first_snapshot_params)
 
 
 
-    plt.ylabel("Y")
-    plt.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("results/fit_curve.png", dpi=300)
-
-
-    plt.figure(figsize=(8, 6))
-    plt.plot(x_fit, y_fit, "r-", lw=2, label="Final Fitted Curve")
-    plt.legend()
-    plt.title(f"Final Curve Only (Theta={theta:.2f}, M={M:.4f}, X={X:.2f})")
-    plt.xlabel("X")
-    plt.ylabel("Y")
-    plt.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("results/final_curve_only.png", dpi=300)
-
-    # 3️ Residuals vs t
+    # Imported only once the fit is done: DE worker processes re-import this
+    # module and should not pay matplotlib's startup cost.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # 1️ Fit views share the same curves: draw them as panels of one figure
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    ax = axes[0, 0]
+    ax.scatter(x_data, y_data, s=10, alpha=0.4, label="Data", color="gray")
+    ax.plot(x_fit, y_fit, "r-", lw=2, label=f"Final Fit (L1={best.fun:.2f})")
+    ax.set_title("Data + Final Fit")
+
+    ax = axes[0, 1]
+    ax.plot(x_fit, y_fit, "r-", lw=2, label="Final Fitted Curve")
+    ax.set_title(f"Final Curve Only (Theta={theta:.2f}, M={M:.4f}, X={X:.2f})")
+
+    ax = axes[1, 0]
+    ax.scatter(x_data, y_data, s=10, alpha=0.4, label="Data", color="gray")
+    ax.plot(x_fit_initial, y_fit_initial, "b-", lw=2, label=f"Initial Guess (L1={initial_l1:.2f})")
+    ax.plot(x_fit, y_fit, "r-", lw=2.5, label=f"Final Fit (L1={best.fun:.2f})")
+    ax.set_title("Fit Comparison (Start vs. Final)")
+
+    ax = axes[1, 1]
+    ax.plot(x_fit_initial, y_fit_initial, "b-", lw=2, label=f"Initial Guess (L1={initial_l1:.2f})")
+    ax.plot(x_fit, y_fit, "r-", lw=2, label=f"Final Fit (L1={best.fun:.2f})")
+    ax.set_title("Initial Guess vs. Final Fit (Curves Only)")
+
+    for ax in axes.flat:
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        ax.legend()
+        ax.grid(alpha=0.3)
+    fig.tight_layout()
+    fig.savefig("results/plots_summary.png", dpi=300)
+
+    # 2️ Residuals vs t
     plt.figure(figsize=(10, 4))
     plt.plot(t_vals, residuals, lw=1)
     plt.title("Residuals vs t")
@@ -148,10 +278,9 @@ if __name__ == "__main__":
     plt.savefig("results/residuals_vs_t.png", dpi=300)
 
 
-    df = pd.read_csv("results/de_progress_run1.csv")
     plt.figure(figsize=(8, 4))
-    plt.plot(df["iteration"], df["L1"], lw=1)
-    plt.title("Differential Evolution Progress (Run 1)")
+    plt.plot(iterations, progress, lw=1)
+    plt.title("Differential Evolution Progress")
     plt.xlabel("Iteration")
     plt.ylabel("Best L1")
     plt.grid(alpha=0.3)
@@ -159,41 +288,12 @@ if __name__ == "__main__":
     plt.savefig("results/de_progress.png", dpi=300)
 
 
-    plt.figure(figsize=(8, 6))
-    plt.scatter(x_data, y_data, s=10, alpha=0.4, label="Data", color="gray")
-    plt.plot(x_fit_initial, y_fit_initial, "b-", lw=2, label=f"Initial Guess (L1={initial_l1:.2f})")
-    plt.plot(x_fit, y_fit, "r-", lw=2.5, label=f"Final Fit (L1={best.fun:.2f})")
-    plt.title("Fit Comparison (Start vs. Final)")
-    plt.xlabel("X")
-    plt.ylabel("Y")
-    plt.legend()
-    plt.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("results/fit_comparison.png", dpi=300)
-
-
-    plt.figure(figsize=(8, 6))
-    plt.plot(x_fit_initial, y_fit_initial, "b-", lw=2, label=f"Initial Guess (L1={initial_l1:.2f})")
-    plt.plot(x_fit, y_fit, "r-", lw=2, label=f"Final Fit (L1={best.fun:.2f})")
-    plt.title("Initial Guess vs. Final Fit (Curves Only)")
-    plt.xlabel("X")
-    plt.ylabel("Y")
-    plt.legend()
-    plt.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig("results/initial_vs_final_curve_only.png", dpi=300)
-
-
-    # 7️ Save parameters
-    pd.DataFrame({"theta_deg": [theta], "M": [M], "X": [X], "L1": [best.fun]}).to_csv(
-        "results/best_params.csv", index=False
-    )
+    # 3️ Save parameters
+    np.savetxt("results/best_params.csv", [[theta, M, X, best.fun]],
+               delimiter=",", header="theta_deg,M,X,L1", comments="", fmt="%.12g")
 
     print("\nSaved results in ./results/ :")
-    print(" - fit_curve.png (Data + Final Fit)")
-    print(" - final_curve_only.png (Just the Final Fit)")
-    print(" - fit_comparison.png (Data + Start + Final)")
-    print(" - initial_vs_final_curve_only.png (Start + Final Curves)")
+    print(" - plots_summary.png (Data + Fit, Final Curve, Start vs Final, Curves Only)")
     print(" - residuals_vs_t.png")
     print(" - de_progress.png")
     print(" - best_params.csv")